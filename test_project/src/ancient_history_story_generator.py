@@ -5,7 +5,6 @@ from typing import Optional, Dict, Any, List
 import time
 from datetime import datetime
 
-from google import genai
 from google.genai import types
 
 from .config import (
@@ -15,7 +14,7 @@ from .config import (
     BEDTIME_SETTINGS
 )
 from .base import BaseComponent
-from .utils import retry_with_backoff, rate_limiter
+from .utils import retry_with_backoff, rate_limiter, get_gemini_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +29,7 @@ class AncientHistoryStoryGenerator(BaseComponent):
         """Setup Gemini API with first available key"""
         for api_key in GEMINI_API_KEYS:
             try:
-                self.client = genai.Client(api_key=api_key)
+                self.client = get_gemini_client(api_key)
                 logger.info("Successfully initialized Gemini API")
                 return
             except Exception as e:
@@ -1,8 +1,8 @@
 import json
 import logging
+import time
 from pathlib import Path
 from typing import Optional, Dict, Any
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +21,7 @@ class BaseComponent:
         
     def get_timestamp(self) -> str:
         """Get current timestamp string"""
-        return datetime.now().strftime("%Y%m%d_%H%M%S")
+        return time.strftime("%Y%m%d_%H%M%S", time.localtime())
     
     def save_output(self, content: str, filename: str) -> Path:
         """Save content to output file
@@ -34,8 +34,7 @@ class BaseComponent:
             Path to saved file
         """
         filepath = self.output_dir / filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        filepath.write_text(content, encoding='utf-8')
         logger.info(f"Saved output to: {filepath}")
         return filepath
     
@@ -1,9 +1,10 @@
 """Main pipeline for automated bedtime history video creation"""
 
+import asyncio
 import logging
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 # Replace BedtimeStoryGenerator with AncientHistoryStoryGenerator
@@ -15,7 +16,6 @@ from .bedtime_video_creator import BedtimeVideoCreator
 from .youtube_uploader import YouTubeUploader
 from .thumbnail_generator import ThumbnailGenerator
 from .config import OUTPUT_DIR, FILE_PATTERNS
-from .utils import file_manager
 
 logger = logging.getLogger(__name__)
 
@@ -70,9 +70,11 @@ class BedtimeHistoryPipeline:
             logger.info(f"✅ Generated story with {metadata['statistics']['scene_count']} scenes")
             logger.info(f"📊 Story stats: {metadata['statistics']['total_words']} words")
             
-            # Step 2: Generate thumbnail for YouTube
-            logger.info("🖼️ Step 2: Generating YouTube thumbnail...")
-            thumbnail_result = self.thumbnail_generator.process(story_result)
+            # Step 2: Generate thumbnail for YouTube and scene audio concurrently
+            logger.info("🖼️🎵 Step 2: Generating YouTube thumbnail and scene audio...")
+            thumbnail_result, audio_result = asyncio.run(
+                self._generate_thumbnail_and_audio(story_result, story_data["scenes"])
+            )
             
             if not thumbnail_result or not thumbnail_result.get("success", False):
                 logger.warning("Thumbnail generation failed, proceeding without custom thumbnail")
@@ -81,6 +83,12 @@ class BedtimeHistoryPipeline:
                 thumbnail_file = thumbnail_result["thumbnail_file"]
                 logger.info(f"✅ Generated YouTube thumbnail: {thumbnail_file}")
             
+            if not audio_result or "combined_audio" not in audio_result:
+                raise RuntimeError("Audio generation failed")
+                
+            logger.info(f"✅ Generated {len(audio_result['scene_audios'])} scene audio files")
+            logger.info(f"📊 Total audio duration: {audio_result['metadata']['total_duration']:.2f}s")
+            
             # Step 3: Generate scene images
             logger.info("🎨 Step 3: Generating scene images...")
             image_result = self.image_generator.process_scenes(story_data["scenes"])
@@ -90,18 +98,8 @@ class BedtimeHistoryPipeline:
                 
             logger.info(f"✅ Generated {len(image_result['images'])} scene images")
             
-            # Step 4: Generate scene audio
-            logger.info("🎵 Step 4: Generating scene audio...")
-            audio_result = self.audio_generator.process_scenes(story_data["scenes"])
-            
-            if not audio_result or "combined_audio" not in audio_result:
-                raise RuntimeError("Audio generation failed")
-                
-            logger.info(f"✅ Generated {len(audio_result['scene_audios'])} scene audio files")
-            logger.info(f"📊 Total audio duration: {audio_result['metadata']['total_duration']:.2f}s")
-            
-            # Step 5: Generate subtitles
-            logger.info("💬 Step 5: Generating subtitles...")
+            # Step 4: Generate subtitles
+            logger.info("💬 Step 4: Generating subtitles...")
             subtitle_result = self.subtitle_generator.process_audio(Path(audio_result["combined_audio"]["final_audio_file"]))
             
             if not subtitle_result:
@@ -109,8 +107,8 @@ class BedtimeHistoryPipeline:
                 
             logger.info(f"✅ Generated subtitles with {subtitle_result['metadata']['segment_count']} segments")
             
-            # Step 6: Create final video
-            logger.info("🎬 Step 6: Creating final video...")
+            # Step 5: Create final video
+            logger.info("🎬 Step 5: Creating final video...")
             video_result = self.video_creator.process_bedtime_video(
                 images=image_result["images"],
                 scene_durations=[audio["duration"] for audio in audio_result["scene_audios"]],
@@ -124,8 +122,8 @@ class BedtimeHistoryPipeline:
             logger.info(f"✅ Created video: {video_result['video_file']}")
             logger.info(f"📊 Video duration: {video_result['metadata']['duration']:.2f}s")
             
-            # Step 7: Upload to YouTube with thumbnail
-            logger.info("📺 Step 7: Uploading to YouTube...")
+            # Step 6: Upload to YouTube with thumbnail
+            logger.info("📺 Step 6: Uploading to YouTube...")
             upload_result = self.youtube_uploader.upload_video_with_thumbnail(
                 video_file=video_result["video_file"],
                 title=story_data["video_title"],
@@ -196,6 +194,27 @@ class BedtimeHistoryPipeline:
                 "metadata": error_metadata
             }
     
+    async def _generate_thumbnail_and_audio(self, story_result: Dict[str, Any],
+                                            scenes: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Generate the YouTube thumbnail while scene audio is synthesized
+        
+        The thumbnail is a remote Gemini call and the audio is local Kokoro TTS,
+        so running them together hides the thumbnail latency without competing
+        for API quota.
+        
+        Args:
+            story_result: Result from story generation step
+            scenes: List of scene data with narration_text
+            
+        Returns:
+            Tuple of thumbnail result and audio result
+        """
+        thumbnail_result, audio_result = await asyncio.gather(
+            self.thumbnail_generator.aprocess(story_result),
+            asyncio.to_thread(self.audio_generator.process_scenes, scenes)
+        )
+        return thumbnail_result, audio_result
+    
     def test_all_components(self) -> bool:
         """Test all pipeline components
         
@@ -19,7 +19,7 @@ from .config import (
     BEDTIME_SETTINGS
 )
 from .base import BaseComponent
-from .utils import retry_with_backoff, rate_limiter
+from .utils import retry_with_backoff, rate_limiter, get_gemini_client
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +28,7 @@ class BedtimeImageGenerator(BaseComponent):
     
     def __init__(self, output_dir: Optional[Path] = None):
         super().__init__(output_dir)
-        self.api_clients = []
-        for api_key in GEMINI_API_KEYS:
-            client = genai.Client(api_key=api_key)
-            self.api_clients.append(client)
+        self.api_clients = [get_gemini_client(api_key) for api_key in GEMINI_API_KEYS]
         self.current_client_idx = 0
         
         # Optimized settings for bedtime content
@@ -101,7 +98,7 @@ class BedtimeImageGenerator(BaseComponent):
         return enhanced_prompt
 
     @retry_with_backoff(max_retries=3, base_delay=2.0)
-    @rate_limiter(calls=1, period=6.0)
+    @rate_limiter(calls=len(GEMINI_API_KEYS), period=6.0)  # One call per API client per period
     def _generate_single_image(self, scene: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a single bedtime image with retry logic and rate limiting
         
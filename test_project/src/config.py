@@ -84,11 +84,12 @@ FFMPEG_SETTINGS = {
 # YouTube Settings
 YOUTUBE_SETTINGS = {
     "client_secrets_file": str(ROOT_DIR / "client_secrets.json"),
-    "token_file": str(ROOT_DIR / "youtube_token.pickle"),
+    "token_file": str(ROOT_DIR / "youtube_token.json"),
     "default_privacy": "public",  # Options: "private", "unlisted", "public"
     "default_category": "22",       # 22 = "People & Blogs", 27 = "Education"
     "notify_subscribers": False,
     "auto_upload": True,            # Whether to automatically upload videos
+    "resumable_chunksize_mb": 32,   # Upload chunk size, fewer round-trips per video
     "default_tags": [
         "bedtime history",
         "educational",
@@ -3,9 +3,8 @@ import time
 import soundfile as sf
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-import subprocess
-import os
 
+import onnxruntime as ort
 from kokoro_onnx import Kokoro
 
 from .config import (
@@ -18,6 +17,19 @@ from .utils import retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
+# Hardware execution providers to try before falling back to CPU, in order of preference
+PREFERRED_ONNX_PROVIDERS = (
+    "CUDAExecutionProvider",
+    "CoreMLExecutionProvider",
+    "DmlExecutionProvider"
+)
+
+# Tuning options for the CUDA provider
+CUDA_PROVIDER_OPTIONS = {
+    "cudnn_conv_use_max_workspace": "1",
+    "arena_extend_strategy": "kNextPowerOfTwo"
+}
+
 class SceneAudioGenerator(BaseComponent):
     """Generates audio for individual scenes using Kokoro TTS"""
     
@@ -37,18 +49,44 @@ class SceneAudioGenerator(BaseComponent):
             if not voices_path.exists():
                 raise FileNotFoundError(f"Kokoro voices not found at: {voices_path}")
             
-            # Initialize TTS
-            self.tts = Kokoro(
-                model_path=str(model_path),
-                voices_path=str(voices_path)
+            # Build the ONNX session ourselves so we can use GPU providers when available
+            providers = self._get_onnx_providers()
+            session_options = ort.SessionOptions()
+            session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(
+                str(model_path),
+                sess_options=session_options,
+                providers=providers
             )
             
-            logger.info("Successfully initialized Kokoro TTS")
+            # Initialize TTS
+            self.tts = Kokoro.from_session(session, str(voices_path))
+            
+            logger.info(f"Successfully initialized Kokoro TTS with providers: {session.get_providers()}")
             
         except Exception as e:
             logger.error(f"Failed to initialize Kokoro TTS: {str(e)}")
             raise RuntimeError(f"TTS initialization failed: {str(e)}")
     
+    def _get_onnx_providers(self) -> List[Any]:
+        """Get ONNX Runtime execution providers, best available first
+        
+        Returns:
+            Provider list ending with the CPU provider as fallback
+        """
+        available = ort.get_available_providers()
+        providers: List[Any] = []
+        
+        for provider in PREFERRED_ONNX_PROVIDERS:
+            if provider in available:
+                if provider == "CUDAExecutionProvider":
+                    providers.append((provider, CUDA_PROVIDER_OPTIONS))
+                else:
+                    providers.append(provider)
+        
+        providers.append("CPUExecutionProvider")
+        return providers
+    
     def _clean_text_for_tts(self, text: str) -> str:
         """Clean and prepare text for TTS processing
         
@@ -107,8 +145,10 @@ class SceneAudioGenerator(BaseComponent):
             )
             audio_path = self.output_dir / audio_filename
             
-            # Save audio file
-            sf.write(str(audio_path), samples, sample_rate)
+            # Save audio file as 16-bit PCM (half the size of float32 samples)
+            with sf.SoundFile(str(audio_path), 'w', samplerate=sample_rate,
+                              channels=1, subtype='PCM_16') as out:
+                out.write(samples)
             
             # Calculate duration and processing time
             duration = len(samples) / sample_rate
@@ -147,35 +187,14 @@ class SceneAudioGenerator(BaseComponent):
             final_audio_filename = FILE_PATTERNS["final_audio"].format(timestamp=timestamp)
             final_audio_path = self.output_dir / final_audio_filename
             
-            # Use ffmpeg to concatenate audio files
-            audio_files = [scene["audio_file"] for scene in scene_audios]
-            
-            # Create a temporary file list for ffmpeg
-            concat_file = self.output_dir / f"concat_list_{timestamp}.txt"
-            with open(concat_file, 'w') as f:
-                for audio_file in audio_files:
-                    f.write(f"file '{audio_file}'\n")
-            
-            # Run ffmpeg to concatenate
-            cmd = [
-                "ffmpeg",
-                "-y",  # Overwrite output file
-                "-f", "concat",
-                "-safe", "0",
-                "-i", str(concat_file),
-                "-c", "copy",
-                str(final_audio_path)
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Clean up temporary file
-            concat_file.unlink()
+            # Stream each scene into a single PCM_16 file; all scenes share
+            # Kokoro's sample rate, so no re-encoding is needed
+            sample_rate = scene_audios[0]["sample_rate"]
+            with sf.SoundFile(str(final_audio_path), 'w', samplerate=sample_rate,
+                              channels=1, subtype='PCM_16') as out:
+                for scene in scene_audios:
+                    with sf.SoundFile(scene["audio_file"]) as scene_file:
+                        out.write(scene_file.read(dtype='int16'))
             
             # Calculate total duration
             total_duration = sum(scene["duration"] for scene in scene_audios)
@@ -190,9 +209,6 @@ class SceneAudioGenerator(BaseComponent):
                 "individual_durations": [scene["duration"] for scene in scene_audios]
             }
             
-        except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg error: {e.stderr}")
-            raise RuntimeError("Failed to combine audio files")
         except Exception as e:
             logger.error(f"Error combining audio files: {str(e)}")
             raise
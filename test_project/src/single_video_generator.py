@@ -1,6 +1,9 @@
 import os
 import logging
 from pathlib import Path
+from typing import Optional
+
+from .bedtime_history_pipeline import BedtimeHistoryPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -9,11 +12,23 @@ class SingleVideoGenerator:
         self.prompts_dir = Path(prompts_dir)
         self.prompts_dir.mkdir(exist_ok=True)
         self.progress_file = "prompt_progress.txt"
+        self._pipeline: Optional[BedtimeHistoryPipeline] = None
+    
+    def _get_pipeline(self) -> BedtimeHistoryPipeline:
+        """Get the pipeline, creating it on first use so models stay loaded across videos"""
+        if self._pipeline is None:
+            self._pipeline = BedtimeHistoryPipeline()
+        return self._pipeline
     
     def get_all_prompts(self):
         """Get all prompts in alphabetical order"""
-        prompt_files = sorted(list(self.prompts_dir.glob("*.txt")))
-        return [f.stem for f in prompt_files]
+        with os.scandir(self.prompts_dir) as entries:
+            prompt_names = [
+                entry.name[:-4] for entry in entries
+                if entry.name.endswith(".txt") and entry.is_file()
+            ]
+        prompt_names.sort()
+        return prompt_names
     
     def get_processed_prompts(self):
         """Get list of already processed prompts"""
@@ -42,12 +57,9 @@ class SingleVideoGenerator:
     
     def mark_as_processed(self, prompt_name):
         """Mark a prompt as processed"""
-        processed = self.get_processed_prompts()
-        processed.append(prompt_name)
-        
-        with open(self.progress_file, 'w') as f:
-            for p in processed:
-                f.write(f"{p}\n")
+        # Append a single line rather than rewriting the whole progress file
+        with open(self.progress_file, 'a') as f:
+            f.write(f"{prompt_name}\n")
         
         logger.info(f"✅ Marked '{prompt_name}' as processed")
     
@@ -85,8 +97,7 @@ class SingleVideoGenerator:
             logger.info(f"📖 Prompt: {prompt_content[:100]}...")
             
             # Run the pipeline
-            from .bedtime_history_pipeline import BedtimeHistoryPipeline
-            pipeline = BedtimeHistoryPipeline()
+            pipeline = self._get_pipeline()
             result = pipeline.run(prompt_content)
             
             if result and result.get('success'):
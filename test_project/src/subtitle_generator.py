@@ -1,9 +1,15 @@
+import io
+import math
 import logging
 import json
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import timedelta
+import numpy as np
+import soundfile as sf
 import whisper
+from scipy.signal import resample_poly
 
 from .config import (
     FILE_PATTERNS,
@@ -14,23 +20,61 @@ from .utils import retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
+# Single SRT cue followed by the blank line that separates entries
+SRT_ENTRY_TEMPLATE = "{index}\n{start} --> {end}\n{text}\n\n"
+
+# Whisper models loaded in this process, each with the lock serializing its
+# transcribe calls. Whisper installs kv-cache hooks on the shared decoder
+# modules for each decode, so concurrent calls on one model would corrupt
+# each other's caches.
+_whisper_models: Dict[str, Tuple[Any, threading.Lock]] = {}
+_whisper_models_lock = threading.Lock()
+
+def _get_whisper_model(model_name: str) -> Tuple[Any, threading.Lock]:
+    """Load a Whisper model once per process and share it across generators
+    
+    Returns:
+        Tuple of the model and its transcribe lock
+    """
+    # Check and load under one lock, so generators created in parallel
+    # (batch runs) don't each load their own copy
+    with _whisper_models_lock:
+        if model_name not in _whisper_models:
+            _whisper_models[model_name] = (whisper.load_model(model_name), threading.Lock())
+        return _whisper_models[model_name]
+
 class SubtitleGenerator(BaseComponent):
     """Generates subtitles using Whisper speech-to-text"""
     
     def __init__(self, output_dir: Optional[Path] = None, model_name: str = "base"):
         super().__init__(output_dir)
         self.model_name = model_name
-        self._load_model()
+        self.model = None
+        self._transcribe_lock: Optional[threading.Lock] = None
+        self._load_error: Optional[Exception] = None
+        
+        # Load the model in the background so other pipeline work can proceed
+        self._model_ready = threading.Event()
+        self._load_thread = threading.Thread(target=self._load_model, daemon=True)
+        self._load_thread.start()
     
     def _load_model(self) -> None:
         """Load Whisper model for transcription"""
         try:
             logger.info(f"Loading Whisper model: {self.model_name}")
-            self.model = whisper.load_model(self.model_name)
+            self.model, self._transcribe_lock = _get_whisper_model(self.model_name)
             logger.info("Successfully loaded Whisper model")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {str(e)}")
-            raise RuntimeError(f"Whisper model loading failed: {str(e)}")
+            self._load_error = e
+        finally:
+            self._model_ready.set()
+    
+    def _wait_for_model(self) -> None:
+        """Block until the background model load has finished"""
+        self._model_ready.wait()
+        if self._load_error is not None:
+            raise RuntimeError(f"Whisper model loading failed: {str(self._load_error)}")
     
     def _format_timestamp(self, seconds: float) -> str:
         """Format timestamp for SRT format
@@ -97,49 +141,74 @@ class SubtitleGenerator(BaseComponent):
         Returns:
             SRT formatted string
         """
-        srt_parts = []
+        buffer = io.StringIO()
         
         for i, segment in enumerate(segments, 1):
-            start_time = self._format_timestamp(segment["start"])
-            end_time = self._format_timestamp(segment["end"])
-            text = segment["text"].strip()
-            
             # Format text with line and character limits
-            formatted_text = self._format_subtitle_text(text)
+            buffer.write(SRT_ENTRY_TEMPLATE.format(
+                index=i,
+                start=self._format_timestamp(segment["start"]),
+                end=self._format_timestamp(segment["end"]),
+                text=self._format_subtitle_text(segment["text"].strip())
+            ))
+        
+        return buffer.getvalue()
+    
+    def _prepare_audio(self, audio_path: Path, samples: Optional[np.ndarray] = None,
+                       sample_rate: Optional[int] = None) -> np.ndarray:
+        """Load audio as 16 kHz mono float32 so Whisper can skip its ffmpeg decode
+        
+        Args:
+            audio_path: Path to audio file, read only when samples are not given
+            samples: Optional in-memory audio samples
+            sample_rate: Sample rate of the in-memory samples
             
-            srt_parts.extend([
-                str(i),
-                f"{start_time} --> {end_time}",
-                formatted_text,
-                ""  # Empty line between entries
-            ])
+        Returns:
+            Audio samples ready for Whisper
+        """
+        if samples is None:
+            samples, sample_rate = sf.read(str(audio_path), dtype="float32")
+        
+        audio = np.asarray(samples, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
         
-        return "\n".join(srt_parts)
+        if sample_rate != whisper.audio.SAMPLE_RATE:
+            factor = math.gcd(int(sample_rate), whisper.audio.SAMPLE_RATE)
+            audio = resample_poly(
+                audio,
+                whisper.audio.SAMPLE_RATE // factor,
+                int(sample_rate) // factor
+            ).astype(np.float32)
+        
+        return audio
     
     @retry_with_backoff(max_retries=3, base_delay=2.0)
-    def _transcribe_audio(self, audio_path: Path) -> Dict[str, Any]:
-        """Transcribe audio file using Whisper with optimized settings
+    def _transcribe_audio(self, audio: np.ndarray) -> Dict[str, Any]:
+        """Transcribe audio samples using Whisper with optimized settings
         
         Args:
-            audio_path: Path to audio file
+            audio: 16 kHz mono float32 audio samples
             
         Returns:
             Transcription result
         """
         try:
-            logger.info(f"Transcribing audio: {audio_path}")
+            logger.info(f"Transcribing {len(audio) / whisper.audio.SAMPLE_RATE:.2f}s of audio")
             
-            # Transcribe with optimized settings for bedtime content
-            result = self.model.transcribe(
-                str(audio_path),
-                language="en",          # Specify language for better accuracy
-                beam_size=5,            # Increase beam size for better results
-                best_of=5,              # Number of candidates to consider
-                temperature=0.0,        # Reduce randomness for consistent results
-                verbose=False,          # Reduce output verbosity
-                fp16=False,             # Use full precision for better accuracy
-                word_timestamps=True    # Get word-level timestamps
-            )
+            # Transcribe with optimized settings for bedtime content.
+            # Kokoro TTS output is clean speech, so greedy decoding (no beam_size)
+            # matches beam search accuracy at a fraction of the decoder cost.
+            with self._transcribe_lock:
+                result = self.model.transcribe(
+                    audio,
+                    language="en",          # Specify language for better accuracy
+                    temperature=0.0,        # Reduce randomness for consistent results
+                    condition_on_previous_text=False,  # Avoid repetition loops across windows
+                    verbose=False,          # Reduce output verbosity
+                    fp16=False,             # Use full precision for better accuracy
+                    word_timestamps=True    # Get word-level timestamps
+                )
             
             logger.info(f"Transcription completed with {len(result.get('segments', []))} segments")
             return result
@@ -148,11 +217,14 @@ class SubtitleGenerator(BaseComponent):
             logger.error(f"Transcription failed: {str(e)}")
             raise
     
-    def process_audio(self, audio_path: Path, **kwargs) -> Dict[str, Any]:
+    def process_audio(self, audio_path: Path, samples: Optional[np.ndarray] = None,
+                      sample_rate: Optional[int] = None, **kwargs) -> Dict[str, Any]:
         """Generate subtitles for audio file
         
         Args:
             audio_path: Path to audio file
+            samples: Optional in-memory samples of the same audio, avoids re-reading the file
+            sample_rate: Sample rate of the in-memory samples
             **kwargs: Additional arguments
             
         Returns:
@@ -161,11 +233,16 @@ class SubtitleGenerator(BaseComponent):
         logger.info(f"Generating subtitles for {audio_path}")
         
         # Verify audio file exists
-        if not audio_path.exists():
+        if samples is None and not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
+        audio = self._prepare_audio(audio_path, samples, sample_rate)
+        
+        # Make sure the background model load has completed
+        self._wait_for_model()
+        
         # Transcribe audio
-        result = self._transcribe_audio(audio_path)
+        result = self._transcribe_audio(audio)
         
         if not result or "segments" not in result:
             raise RuntimeError("Transcription failed")
@@ -193,9 +270,9 @@ class SubtitleGenerator(BaseComponent):
             "duration": result["segments"][-1]["end"] if result["segments"] else 0,
             "model_used": self.model_name,
             "settings": {
-                "beam_size": 5,
-                "best_of": 5,
+                "decoding": "greedy",
                 "temperature": 0.0,
+                "condition_on_previous_text": False,
                 "max_chars_per_line": 50,
                 "max_lines": 2,
                 "word_timestamps": True
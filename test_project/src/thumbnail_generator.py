@@ -1,10 +1,26 @@
+import asyncio
+import hashlib
 import logging
+import os
+import random
+import re
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 from io import BytesIO
 import json
+import weakref
+
+try:
+    import orjson  # Optional, parses JSON several times faster than the stdlib
+except ImportError:
+    orjson = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB  # Optional, SIMD JPEG decoding
+    turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    turbo_jpeg = None
 
 from google import genai
 from google.genai import types
@@ -16,26 +32,129 @@ from .config import (
     FILE_PATTERNS
 )
 from .base import BaseComponent
-from .utils import retry_with_backoff, rate_limiter
+from .utils import TokenBucket, get_gemini_client
 
 logger = logging.getLogger(__name__)
 
+# Image model rate limit (one request per 6 seconds), shared by all generator instances
+THUMBNAIL_RATE_LIMIT = TokenBucket(1, 6.0)
+
+# Exponential backoff delays between thumbnail generation retries
+THUMBNAIL_RETRY_DELAYS = tuple(min(2.0 * (1 << attempt), 60.0) for attempt in range(3))
+
+# YouTube thumbnail resolution
+THUMBNAIL_SIZE = (1280, 720)
+
+# YouTube rejects custom thumbnails larger than 2 MB
+THUMBNAIL_MAX_BYTES = 2 * 1024 * 1024
+
+# Magic bytes used to detect the format of the returned image
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+
+# Phrases the model uses when it describes the hook text it included
+HOOK_MARKER_PATTERN = re.compile(
+    r'\b(?:3-word hook|three-word hook|hook text|hook phrase|included the text|text included|text in the image)\b',
+    re.IGNORECASE
+)
+
+# Sentence terminator: ., ! or ? followed by whitespace, or a line break
+SENTENCE_END_PATTERN = re.compile(r'[.!?](?=\s)|\n')
+
+# A single ALL CAPS word of 2+ letters (e.g. PHARAOH'S)
+UPPERCASE_WORD = r'\b[A-Z][A-Z\'’]+\b'
+UPPERCASE_WORD_PATTERN = re.compile(UPPERCASE_WORD)
+
+# A run of 3+ ALL CAPS words, possibly punctuated (e.g. PHARAOH'S LAST STAND, EMPIRE. RISES. AGAIN.)
+UPPERCASE_RUN = r'(?:' + UPPERCASE_WORD + r'[\s,.!?:;]*){3,}'
+UPPERCASE_RUN_PATTERN = re.compile(UPPERCASE_RUN)
+
+# Matches a quoted hook (e.g. "SECRETS OF BABYLON") or a run of ALL CAPS words
+HOOK_TEXT_PATTERN = re.compile(r'["“]([^"”]{3,60})["”]|(' + UPPERCASE_RUN + ')')
+
+# Static scaffold for thumbnail prompts, built once at import; only the
+# story-specific fields are filled in per call
+THUMBNAIL_PROMPT_TEMPLATE = """
+Create a captivating YouTube thumbnail for the "Whispers of History" channel's video titled:
+"{video_title}"
+
+THUMBNAIL DESCRIPTION:
+{thumbnail_description}
+
+HISTORICAL CONTEXT:
+{historical_context}
+
+STORY TITLE:
+{story_title}
+
+{chapter_context}
+
+CRITICAL REQUIREMENTS:
+- Create a YOUTUBE THUMBNAIL optimized for click-through rate
+- 16:9 aspect ratio (1280x720 pixels)
+- MUST INCLUDE A HUMAN FIGURE IN SIDE VIEW/PROFILE (not facing camera directly)
+- The human should be in period-appropriate clothing for the historical setting
+- The human figure should be a close-up shot showing head and shoulders or upper body
+- Avoid showing detailed facial features - keep them slightly obscured or in shadow
+- Must be historically themed and visually compelling
+- Should be instantly recognizable as ancient history content
+- Focus on the most visually interesting elements from the story outline
+
+HOOK TEXT REQUIREMENTS:
+- CREATE AND INCLUDE A POWERFUL 3-WORD HOOK DIRECTLY IN THE IMAGE
+- The hook should be catchy, dramatic, and relevant to the historical content
+- Use ALL CAPS for the hook text
+- Examples of good hooks: "EMPIRE RISES AGAIN", "SECRETS OF BABYLON", "PHARAOH'S LAST STAND"
+- The hook should evoke curiosity and emotion
+- The hook should relate to the key themes or events in the story
+
+STYLE REQUIREMENTS:
+- Dramatic lighting with strong contrast
+- Rich, vibrant colors that pop on small screens
+- Clear focal point that draws the eye
+- Vintage/historical aesthetic but with modern visual appeal
+- Cinematic composition with depth
+- Slightly dreamlike/mystical quality
+- Side-lit profile of human figure creating dramatic shadows
+- The hook text should be in a dramatic, bold font (like "Cinzel")
+- Text should be large, clear and readable with high contrast against the background
+- Text placement should be at the bottom of the image with good visual balance
+
+TECHNICAL REQUIREMENTS:
+- High detail and sharpness in the central focal point
+- Balanced composition with visual hierarchy
+- Strong color contrast to stand out in YouTube search results
+- Avoid overly busy backgrounds that distract from the main subject
+- Create visual intrigue that makes viewers want to click
+- The hook text should be integrated directly into the image
+- Text should be in a dramatic serif font, bold, and easily readable
+- Text color should contrast well with the background (white with shadow or glow effect works well)
+
+ART STYLE TAGS: cinematic, dramatic lighting, historical, vibrant colors, high contrast, YouTube thumbnail, eye-catching, professional, human profile, side view, integrated text
+
+IMPORTANT: After generating the image, please describe what 3-word hook text you included in the thumbnail.
+"""
+
 class ThumbnailGenerator(BaseComponent):
     """Generates YouTube thumbnails using Google Gemini API"""
     
     def __init__(self, output_dir: Optional[Path] = None):
         super().__init__(output_dir)
+        self._prompt_cache: Dict[bytes, str] = {}
+        # Async clients per event loop; their HTTP sessions are bound to the loop they first ran on
+        self._aio_clients = weakref.WeakKeyDictionary()
         self._setup_api()
         
     def _setup_api(self) -> None:
         """Setup Gemini API with first available key"""
         for api_key in GEMINI_API_KEYS:
             try:
-                self.client = genai.Client(api_key=api_key)
+                self.client = get_gemini_client(api_key)
+                self._api_key = api_key
                 logger.info("Successfully initialized Gemini API for thumbnail generation")
                 return
             except Exception as e:
-                logger.warning(f"Failed to initialize with key: {str(e)}")
+                logger.warning("Failed to initialize with key: %s", e)
         raise RuntimeError("Failed to initialize Gemini API with any key")
         
     def _create_thumbnail_prompt(self, thumbnail_description: str, story_outline: Dict[str, Any]) -> str:
@@ -48,6 +167,14 @@ class ThumbnailGenerator(BaseComponent):
         Returns:
             Enhanced prompt for thumbnail generation
         """
+        # Reuse the prompt when the same outline is passed again (e.g. on regeneration)
+        cache_key = hashlib.blake2b(
+            json.dumps((thumbnail_description, story_outline), sort_keys=True, default=str).encode("utf-8"),
+            digest_size=16
+        ).digest()
+        if cache_key in self._prompt_cache:
+            return self._prompt_cache[cache_key]
+        
         # Extract useful context from the story outline
         story_title = story_outline.get("story_title", "Ancient History Story")
         video_title = story_outline.get("video_title", "Whispers of History")
@@ -59,211 +186,356 @@ class ThumbnailGenerator(BaseComponent):
         
         # Include key information from chapter outlines
         if chapter_outlines:
-            chapter_context = "CHAPTER THEMES:\n"
+            chapter_parts: List[str] = ["CHAPTER THEMES:\n"]
             for i, chapter in enumerate(chapter_outlines[:3]):  # Use first 3 chapters for context
                 chapter_title = chapter.get("chapter_title", f"Chapter {i+1}")
                 setting = chapter.get("historical_setting", "")
                 key_events = chapter.get("key_events", [])
                 facts = chapter.get("historical_facts", [])
                 
-                chapter_context += f"- {chapter_title}: {setting}\n"
+                chapter_parts.append(f"- {chapter_title}: {setting}\n")
                 
                 if key_events:
-                    events_text = ", ".join(key_events[:3])  # Limit to 3 key events
-                    chapter_context += f"  Events: {events_text}\n"
+                    chapter_parts.append(f"  Events: {', '.join(key_events[:3])}\n")  # Limit to 3 key events
                 
                 if facts:
-                    facts_text = ", ".join(facts[:2])  # Limit to 2 facts
-                    chapter_context += f"  Facts: {facts_text}\n"
-        
-        # Create a YouTube-optimized thumbnail prompt with full context
-        enhanced_prompt = f"""
-        Create a captivating YouTube thumbnail for the "Whispers of History" channel's video titled:
-        "{video_title}"
-        
-        THUMBNAIL DESCRIPTION:
-        {thumbnail_description}
-        
-        HISTORICAL CONTEXT:
-        {historical_context}
-        
-        STORY TITLE:
-        {story_title}
-        
-        {chapter_context}
-        
-        CRITICAL REQUIREMENTS:
-        - Create a YOUTUBE THUMBNAIL optimized for click-through rate
-        - 16:9 aspect ratio (1280x720 pixels)
-        - MUST INCLUDE A HUMAN FIGURE IN SIDE VIEW/PROFILE (not facing camera directly)
-        - The human should be in period-appropriate clothing for the historical setting
-        - The human figure should be a close-up shot showing head and shoulders or upper body
-        - Avoid showing detailed facial features - keep them slightly obscured or in shadow
-        - Must be historically themed and visually compelling
-        - Should be instantly recognizable as ancient history content
-        - Focus on the most visually interesting elements from the story outline
-        
-        HOOK TEXT REQUIREMENTS:
-        - CREATE AND INCLUDE A POWERFUL 3-WORD HOOK DIRECTLY IN THE IMAGE
-        - The hook should be catchy, dramatic, and relevant to the historical content
-        - Use ALL CAPS for the hook text
-        - Examples of good hooks: "EMPIRE RISES AGAIN", "SECRETS OF BABYLON", "PHARAOH'S LAST STAND"
-        - The hook should evoke curiosity and emotion
-        - The hook should relate to the key themes or events in the story
-        
-        STYLE REQUIREMENTS:
-        - Dramatic lighting with strong contrast
-        - Rich, vibrant colors that pop on small screens
-        - Clear focal point that draws the eye
-        - Vintage/historical aesthetic but with modern visual appeal
-        - Cinematic composition with depth
-        - Slightly dreamlike/mystical quality
-        - Side-lit profile of human figure creating dramatic shadows
-        - The hook text should be in a dramatic, bold font (like "Cinzel")
-        - Text should be large, clear and readable with high contrast against the background
-        - Text placement should be at the bottom of the image with good visual balance
-        
-        TECHNICAL REQUIREMENTS:
-        - High detail and sharpness in the central focal point
-        - Balanced composition with visual hierarchy
-        - Strong color contrast to stand out in YouTube search results
-        - Avoid overly busy backgrounds that distract from the main subject
-        - Create visual intrigue that makes viewers want to click
-        - The hook text should be integrated directly into the image
-        - Text should be in a dramatic serif font, bold, and easily readable
-        - Text color should contrast well with the background (white with shadow or glow effect works well)
-        
-        ART STYLE TAGS: cinematic, dramatic lighting, historical, vibrant colors, high contrast, YouTube thumbnail, eye-catching, professional, human profile, side view, integrated text
-        
-        IMPORTANT: After generating the image, please describe what 3-word hook text you included in the thumbnail.
-        """
+                    chapter_parts.append(f"  Facts: {', '.join(facts[:2])}\n")  # Limit to 2 facts
+            
+            chapter_context = "".join(chapter_parts)
         
+        # Fill the dynamic fields into the static prompt scaffold
+        enhanced_prompt = THUMBNAIL_PROMPT_TEMPLATE.format_map({
+            "video_title": video_title,
+            "thumbnail_description": thumbnail_description,
+            "historical_context": historical_context,
+            "story_title": story_title,
+            "chapter_context": chapter_context
+        })
+        
+        self._prompt_cache[cache_key] = enhanced_prompt
         return enhanced_prompt
 
-    @retry_with_backoff(max_retries=3, base_delay=2.0)
-    @rate_limiter(calls=1, period=6.0)
-    def _generate_thumbnail(self, thumbnail_prompt: str) -> Dict[str, Any]:
-        """Generate a YouTube thumbnail with retry logic
+    def _get_aio_client(self) -> Any:
+        """Get the async Gemini client for the running event loop
+        
+        The shared sync client is process-wide, but an async client can't be reused
+        across asyncio.run calls (test() then process(), repeated or threaded runs),
+        so each event loop gets its own.
+        """
+        loop = asyncio.get_running_loop()
+        aio_client = self._aio_clients.get(loop)
+        if aio_client is None:
+            aio_client = genai.Client(api_key=self._api_key).aio
+            self._aio_clients[loop] = aio_client
+        return aio_client
+
+    def _get_generation_config(self) -> types.GenerateContentConfig:
+        """Get the Gemini generation config for thumbnails"""
+        return types.GenerateContentConfig(
+            response_modalities=['TEXT', 'IMAGE'],
+            temperature=0.7,  # Higher temperature for more creative hooks
+        )
+
+    async def _save_thumbnail(self, response: Any, start_time: float) -> Dict[str, Any]:
+        """Extract the thumbnail from a Gemini response and save it
         
         Args:
-            thumbnail_prompt: Enhanced prompt for thumbnail generation
+            response: Gemini generate_content response
+            start_time: Time the generation request started
             
         Returns:
             Dictionary with thumbnail data and metadata
         """
-        start_time = time.time()
-        
-        logger.info("Generating YouTube thumbnail...")
-
-        try:
-            response = self.client.models.generate_content(
-                model=IMAGE_MODEL,
-                contents=thumbnail_prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=['TEXT', 'IMAGE'],
-                    temperature=0.7,  # Higher temperature for more creative hooks
-                )
-            )
+        if not response or not response.candidates or not response.candidates[0].content:
+            raise RuntimeError("No thumbnail generated")
 
-            if not response or not response.candidates or not response.candidates[0].content:
-                raise RuntimeError("No thumbnail generated")
+        # Extract image data
+        image_bytes = None
+        description = None
+        content = response.candidates[0].content
+        
+        if not hasattr(content, 'parts') or not content.parts:
+            raise RuntimeError("Response content has no parts")
 
-            # Extract image data
-            image_data = None
-            description = None
-            content = response.candidates[0].content
-            
-            if not hasattr(content, 'parts') or not content.parts:
-                raise RuntimeError("Response content has no parts")
-
-            for part in content.parts:
-                if hasattr(part, 'text') and part.text is not None:
-                    description = part.text
-                elif hasattr(part, 'inline_data') and part.inline_data is not None and hasattr(part.inline_data, 'data'):
-                    image_bytes = part.inline_data.data
+        for part in content.parts:
+            text = getattr(part, 'text', None)
+            if text is not None:
+                description = text
+            else:
+                inline_data = getattr(part, 'inline_data', None)
+                if inline_data is not None and hasattr(inline_data, 'data'):
+                    image_bytes = inline_data.data
                     if not isinstance(image_bytes, bytes):
                         raise RuntimeError("Invalid image data type")
-                    image = Image.open(BytesIO(image_bytes))
-                    # Convert to RGB if needed
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                    image_data = image
-
-            if image_data is None:
-                raise RuntimeError("No image data in response")
-
-            # Save thumbnail
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            thumbnail_filename = FILE_PATTERNS["thumbnail"].format(
-                timestamp=timestamp
-            )
-            thumbnail_path = self.output_dir / thumbnail_filename
-            image_data.save(thumbnail_path, quality=95, optimize=True)
-
-            generation_time = time.time() - start_time
-            logger.info(f"YouTube thumbnail generated in {generation_time:.2f}s")
             
-            # Extract the hook text from the model's description
-            hook_text = ""
-            if description:
-                # Look for patterns like "The 3-word hook used is", "I included the hook", etc.
-                description_lower = description.lower()
-                hook_patterns = [
-                    "3-word hook", "three-word hook", "hook text", "hook phrase",
-                    "included the text", "text included", "text in the image"
-                ]
-                
-                for pattern in hook_patterns:
-                    if pattern in description_lower:
-                        # Find sentences containing the pattern
-                        sentences = [s.strip() for s in description.split(".")]
-                        for sentence in sentences:
-                            if pattern in sentence.lower():
-                                # Look for text in quotes or all caps words
-                                if '"' in sentence:
-                                    # Extract text between quotes
-                                    start = sentence.find('"')
-                                    end = sentence.find('"', start + 1)
-                                    if start != -1 and end != -1:
-                                        hook_text = sentence[start+1:end].strip()
-                                        break
-                                else:
-                                    # Look for 3 consecutive uppercase words
-                                    words = sentence.split()
-                                    uppercase_words = [w for w in words if w.isupper() and len(w) > 1]
-                                    if len(uppercase_words) >= 3:
-                                        hook_text = " ".join(uppercase_words[:3])
-                                        break
-                    
-                    if hook_text:
-                        break
-                        
-                # If still no hook found, look for any 3 consecutive uppercase words in the entire description
-                if not hook_text:
-                    words = description.split()
-                    uppercase_words = [w for w in words if w.isupper() and len(w) > 1]
-                    if len(uppercase_words) >= 3:
-                        hook_text = " ".join(uppercase_words[:3])
+            # Stop once both the description and the image have been found
+            if description is not None and image_bytes is not None:
+                break
+
+        if image_bytes is None:
+            raise RuntimeError("No image data in response")
+
+        # Save thumbnail
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(start_time))
+        thumbnail_filename = FILE_PATTERNS["thumbnail"].format(
+            timestamp=timestamp
+        )
+        thumbnail_path = self.output_dir / thumbnail_filename
+        
+        # Decode, encode and write in a worker thread so the event loop (and the
+        # pipeline work gathered with it) keeps running while the image is saved
+        save_task = asyncio.ensure_future(
+            asyncio.to_thread(self._write_thumbnail, image_bytes, thumbnail_path)
+        )
+        
+        # Extract the hook text from the model's description
+        hook_text = self._extract_hook_text(description) if description else ""
+        
+        if hook_text:
+            logger.info("Model-generated hook text: '%s'", hook_text)
+        else:
+            logger.warning("Could not extract hook text from model description")
+        
+        image_size = await save_task
+
+        generation_time = time.time() - start_time
+        logger.info("YouTube thumbnail generated in %.2fs", generation_time)
+
+        metadata = {
+            "thumbnail_path": str(thumbnail_path),
+            "description": description,
+            "timestamp": timestamp,
+            "generation_time": generation_time,
+            "image_size": image_size,
+            "hook_text": hook_text
+        }
+
+        return metadata
+
+    def _write_thumbnail(self, image_bytes: bytes, thumbnail_path: Path) -> Tuple[int, int]:
+        """Write the thumbnail image to disk, re-encoding only when needed
+        
+        Args:
+            image_bytes: Encoded image returned by Gemini
+            thumbnail_path: Final path of the thumbnail
             
-            if hook_text:
-                logger.info(f"Model-generated hook text: '{hook_text}'")
+        Returns:
+            Size (width, height) of the saved image
+        """
+        # Opening only parses the header, pixel data is decoded lazily
+        image_data = Image.open(BytesIO(image_bytes))
+        
+        # Write to a temp file and rename it into place, so a crash mid-save never
+        # leaves a truncated thumbnail at the final path
+        tmp_path = thumbnail_path.with_suffix(thumbnail_path.suffix + '.tmp')
+        
+        if image_bytes.startswith(PNG_SIGNATURE) and image_data.mode == 'RGB':
+            # Already an RGB PNG, write the bytes as-is instead of decoding and re-encoding
+            tmp_path.write_bytes(image_bytes)
+        else:
+            if turbo_jpeg and image_bytes.startswith(JPEG_SIGNATURE):
+                # SIMD libjpeg-turbo decode straight to RGB
+                image_data = self._decode_jpeg(image_bytes, image_data.size)
             else:
-                logger.warning("Could not extract hook text from model description")
-
-            metadata = {
-                "thumbnail_path": str(thumbnail_path),
-                "description": description,
-                "timestamp": timestamp,
-                "generation_time": generation_time,
-                "image_size": image_data.size,
-                "hook_text": hook_text
-            }
+                # Let libjpeg scale large JPEGs down while decoding (no-op for other formats)
+                image_data.draft('RGB', THUMBNAIL_SIZE)
+            
+            # Convert to RGB if needed
+            if image_data.mode != 'RGB':
+                image_data = image_data.convert('RGB')
+            if thumbnail_path.suffix.lower() == '.png':
+                # Fast zlib level; the rare file that ends up over YouTube's limit is shrunk below
+                image_data.save(tmp_path, 'PNG', compress_level=1)
+            else:
+                image_data.save(tmp_path, 'JPEG', quality=90, optimize=False,
+                                subsampling=2, progressive=False)
+        
+        if tmp_path.stat().st_size > THUMBNAIL_MAX_BYTES:
+            image_data = self._shrink_thumbnail(image_data, tmp_path)
+        
+        os.replace(tmp_path, thumbnail_path)
+        return image_data.size
 
-            return metadata
+    def _shrink_thumbnail(self, image_data: Image.Image, tmp_path: Path) -> Image.Image:
+        """Re-save a thumbnail that is over YouTube's size limit
+        
+        Args:
+            image_data: Thumbnail image
+            tmp_path: Temp file holding the oversized thumbnail
+            
+        Returns:
+            The image that was saved
+        """
+        logger.info("Thumbnail is %d bytes, over YouTube's %d byte limit; re-compressing",
+                    tmp_path.stat().st_size, THUMBNAIL_MAX_BYTES)
+        
+        # Scale down to the thumbnail resolution (keeping the aspect ratio) and use full compression
+        image_data = image_data.convert('RGB')
+        image_data.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        
+        if tmp_path.name.lower().endswith('.png.tmp'):
+            image_data.save(tmp_path, 'PNG', optimize=True)
+            if tmp_path.stat().st_size > THUMBNAIL_MAX_BYTES:
+                # A 256 colour palette always fits at thumbnail resolution
+                image_data = image_data.quantize(256)
+                image_data.save(tmp_path, 'PNG', optimize=True)
+        else:
+            image_data.save(tmp_path, 'JPEG', quality=85, optimize=True)
+        return image_data
 
-        except Exception as e:
-            logger.error(f"Error generating YouTube thumbnail: {str(e)}")
-            raise
+    def _decode_jpeg(self, image_bytes: bytes, size: Tuple[int, int]) -> Image.Image:
+        """Decode a JPEG with libjpeg-turbo, scaled down toward the thumbnail size
+        
+        Args:
+            image_bytes: JPEG encoded image
+            size: Full resolution (width, height) of the image
+            
+        Returns:
+            Decoded RGB image
+        """
+        # Largest power-of-two reduction (up to 1/8) that stays at least thumbnail sized
+        width, height = size
+        scale = 1
+        while (scale < 8 and width // (scale * 2) >= THUMBNAIL_SIZE[0]
+               and height // (scale * 2) >= THUMBNAIL_SIZE[1]):
+            scale *= 2
+        
+        pixels = turbo_jpeg.decode(image_bytes, pixel_format=TJPF_RGB, scaling_factor=(1, scale))
+        return Image.fromarray(pixels, 'RGB')
+
+    @staticmethod
+    def _extract_hook_text(description: str) -> str:
+        """Extract the hook text the model says it put in the thumbnail
+        
+        Args:
+            description: Text part of the model response
+            
+        Returns:
+            Quoted hook text, or the first three words of an ALL CAPS run, or ""
+        """
+        # Quoted text is only trusted when the model says it is describing the hook,
+        # otherwise fall back to the first run of ALL CAPS words
+        match = None
+        marker = HOOK_MARKER_PATTERN.search(description)
+        if marker:
+            # Only look at the sentence that mentions the hook
+            start = 0
+            for boundary in SENTENCE_END_PATTERN.finditer(description, 0, marker.start()):
+                start = boundary.end()
+            end = SENTENCE_END_PATTERN.search(description, marker.end())
+            sentence = description[start:end.start() if end else len(description)]
+            
+            match = HOOK_TEXT_PATTERN.search(sentence)
+            if match and match.group(1):
+                return match.group(1).strip()
+        
+        if not match:
+            # No marker, or the hook sentence has neither quotes nor capitals
+            # (e.g. "The hook text sits at the bottom. It reads: EMPIRE RISES AGAIN")
+            match = UPPERCASE_RUN_PATTERN.search(description)
+        
+        if not match:
+            return ""
+        
+        return " ".join(UPPERCASE_WORD_PATTERN.findall(match.group(0))[:3])
+
+    async def _generate_thumbnail(self, thumbnail_prompt: str) -> Dict[str, Any]:
+        """Generate a YouTube thumbnail with rate limiting and retry logic
+        
+        Rate limiting and retries are done inline rather than with the utils
+        decorators so the coroutine can be awaited and cancelled directly.
+        
+        Args:
+            thumbnail_prompt: Enhanced prompt for thumbnail generation
+            
+        Returns:
+            Dictionary with thumbnail data and metadata
+        """
+        max_retries = len(THUMBNAIL_RETRY_DELAYS)
+        aio_client = self._get_aio_client()
+        
+        for attempt in range(max_retries + 1):
+            # Wait for our slot in the image model rate limit
+            wait_time = THUMBNAIL_RATE_LIMIT.acquire()
+            if wait_time:
+                logger.debug("Rate limiting thumbnail generation: sleeping for %.2fs", wait_time)
+                await asyncio.sleep(wait_time)
+            
+            start_time = time.time()
+            
+            logger.info("Generating YouTube thumbnail...")
+
+            try:
+                response = await aio_client.models.generate_content(
+                    model=IMAGE_MODEL,
+                    contents=thumbnail_prompt,
+                    config=self._get_generation_config()
+                )
+                return await self._save_thumbnail(response, start_time)
+
+            except Exception as e:
+                logger.error("Error generating YouTube thumbnail: %s", e)
+                if attempt == max_retries:
+                    logger.error("Thumbnail generation failed after %d retries: %s", max_retries, e)
+                    raise
+                
+                # Add up to 10% jitter to the backoff delay
+                delay = THUMBNAIL_RETRY_DELAYS[attempt]
+                total_delay = delay + delay * 0.1 * random.random()
+                logger.warning("Attempt %d failed for thumbnail generation. Retrying in %.2fs...", attempt + 1, total_delay)
+                await asyncio.sleep(total_delay)
+
+    def _prepare_thumbnail_prompt(self, story_result: Dict[str, Any]) -> str:
+        """Build the thumbnail prompt from a story generation result
+        
+        Args:
+            story_result: Result from story generation step
+            
+        Returns:
+            Enhanced prompt for thumbnail generation
+        """
+        # Extract thumbnail description and story outline
+        story_data = story_result.get("story_data", {})
+        metadata = story_result.get("metadata", {})
+        
+        # Get the full story outline from metadata
+        outline = metadata.get("outline", {})
+        
+        # If outline is empty, try to load it from the outline file
+        if not outline and "outline_file" in story_result:
+            try:
+                outline_file = story_result["outline_file"]
+                logger.info("Loading story outline from %s", outline_file)
+                outline_bytes = Path(outline_file).read_bytes()
+                outline = orjson.loads(outline_bytes) if orjson else json.loads(outline_bytes)
+            except Exception as e:
+                logger.warning("Failed to load outline file: %s", e)
+        
+        # If still no outline, use story data
+        if not outline:
+            outline = story_data
+        
+        thumbnail_description = story_data.get("thumbnail_description", "")
+        if not thumbnail_description:
+            logger.warning("No thumbnail description found, using default")
+            thumbnail_description = "Ancient history scene for YouTube thumbnail"
+        
+        # Create enhanced prompt with full outline context
+        return self._create_thumbnail_prompt(thumbnail_description, outline)
+
+    def _format_result(self, thumbnail_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Format generated thumbnail metadata as a process result"""
+        return {
+            "success": True,
+            "thumbnail_file": thumbnail_result["thumbnail_path"],
+            "metadata": {
+                "description": thumbnail_result["description"],
+                "generation_time": thumbnail_result["generation_time"],
+                "timestamp": thumbnail_result["timestamp"],
+                "image_size": thumbnail_result["image_size"],
+                "hook_text": thumbnail_result.get("hook_text", "")
+            }
+        }
 
     def process(self, story_result: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """Process story result to generate a YouTube thumbnail
@@ -276,53 +548,40 @@ class ThumbnailGenerator(BaseComponent):
             Dictionary with thumbnail generation results and metadata
         """
         try:
-            # Extract thumbnail description and story outline
-            story_data = story_result.get("story_data", {})
-            metadata = story_result.get("metadata", {})
-            
-            # Get the full story outline from metadata
-            outline = metadata.get("outline", {})
+            thumbnail_prompt = self._prepare_thumbnail_prompt(story_result)
             
-            # If outline is empty, try to load it from the outline file
-            if not outline and "outline_file" in story_result:
-                try:
-                    outline_file = story_result["outline_file"]
-                    logger.info(f"Loading story outline from {outline_file}")
-                    with open(outline_file, "r", encoding="utf-8") as f:
-                        outline = json.load(f)
-                except Exception as e:
-                    logger.warning(f"Failed to load outline file: {e}")
+            # Generate thumbnail
+            thumbnail_result = asyncio.run(self._generate_thumbnail(thumbnail_prompt))
             
-            # If still no outline, use story data
-            if not outline:
-                outline = story_data
+            return self._format_result(thumbnail_result)
             
-            thumbnail_description = story_data.get("thumbnail_description", "")
-            if not thumbnail_description:
-                logger.warning("No thumbnail description found, using default")
-                thumbnail_description = "Ancient history scene for YouTube thumbnail"
+        except Exception as e:
+            logger.error("Thumbnail generation failed: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def aprocess(self, story_result: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Async version of process, so thumbnail generation can overlap other pipeline steps
+        
+        Args:
+            story_result: Result from story generation step
+            **kwargs: Additional arguments
             
-            # Create enhanced prompt with full outline context
-            thumbnail_prompt = self._create_thumbnail_prompt(thumbnail_description, outline)
+        Returns:
+            Dictionary with thumbnail generation results and metadata
+        """
+        try:
+            thumbnail_prompt = self._prepare_thumbnail_prompt(story_result)
             
             # Generate thumbnail
-            thumbnail_result = self._generate_thumbnail(thumbnail_prompt)
+            thumbnail_result = await self._generate_thumbnail(thumbnail_prompt)
             
-            # Return result
-            return {
-                "success": True,
-                "thumbnail_file": thumbnail_result["thumbnail_path"],
-                "metadata": {
-                    "description": thumbnail_result["description"],
-                    "generation_time": thumbnail_result["generation_time"],
-                    "timestamp": thumbnail_result["timestamp"],
-                    "image_size": thumbnail_result["image_size"],
-                    "hook_text": thumbnail_result.get("hook_text", "")
-                }
-            }
+            return self._format_result(thumbnail_result)
             
         except Exception as e:
-            logger.error(f"Thumbnail generation failed: {str(e)}")
+            logger.error("Thumbnail generation failed: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -344,15 +603,15 @@ class ThumbnailGenerator(BaseComponent):
             """
             
             # Generate a test thumbnail
-            result = self._generate_thumbnail(test_prompt)
+            result = asyncio.run(self._generate_thumbnail(test_prompt))
             
             if result and "thumbnail_path" in result:
-                logger.info(f"Test successful! Generated thumbnail: {result['thumbnail_path']}")
+                logger.info("Test successful! Generated thumbnail: %s", result['thumbnail_path'])
                 return True
             else:
                 logger.error("Test failed: Incomplete result")
                 return False
                 
         except Exception as e:
-            logger.error(f"Test failed with error: {str(e)}")
+            logger.error("Test failed with error: %s", e)
             return False 
\ No newline at end of file
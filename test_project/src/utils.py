@@ -1,9 +1,12 @@
 import time
 import logging
-from functools import wraps
+import threading
+from functools import lru_cache, wraps
 from typing import Callable, Any
 import random
 
+from google import genai
+
 logger = logging.getLogger(__name__)
 
 def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
@@ -14,6 +17,9 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay:
         base_delay: Base delay between retries
         max_delay: Maximum delay between retries
     """
+    # Exponential backoff delays only depend on the decorator arguments, so compute them once
+    base_delays = tuple(min(base_delay * (1 << attempt), max_delay) for attempt in range(max_retries + 1))
+    
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
@@ -22,61 +28,83 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay:
                     return func(*args, **kwargs)
                 except Exception as e:
                     if attempt == max_retries:
-                        logger.error(f"Function {func.__name__} failed after {max_retries} retries: {str(e)}")
+                        logger.error("Function %s failed after %d retries: %s", func.__name__, max_retries, e)
                         raise
                     
-                    # Calculate delay with exponential backoff and jitter
-                    delay = min(base_delay * (2 ** attempt), max_delay)
-                    jitter = random.uniform(0, delay * 0.1)  # Add up to 10% jitter
-                    total_delay = delay + jitter
+                    # Add up to 10% jitter to the precomputed backoff delay
+                    delay = base_delays[attempt]
+                    total_delay = delay + delay * 0.1 * random.random()
                     
-                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}. Retrying in {total_delay:.2f}s...")
+                    logger.warning("Attempt %d failed for %s: %s. Retrying in %.2fs...", attempt + 1, func.__name__, e, total_delay)
                     time.sleep(total_delay)
             
             return None
         return wrapper
     return decorator
 
+class TokenBucket:
+    """Thread-safe token bucket allowing `capacity` calls per `period` seconds"""
+    
+    __slots__ = ("capacity", "tokens", "rate", "last", "lock")
+    
+    def __init__(self, capacity: int, period: float):
+        """Initialize the bucket full
+        
+        Args:
+            capacity: Number of calls allowed per period (burst size)
+            period: Time period in seconds
+        """
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.rate = capacity / period
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Take a token and return how long the caller must sleep before proceeding
+        
+        The lock is only held for the arithmetic; callers that have to wait reserve
+        their token up front (the balance goes negative) and sleep outside the lock.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
 def rate_limiter(calls: int = 1, period: float = 1.0):
     """Decorator for rate limiting function calls
     
+    Safe to use from multiple threads.
+    
     Args:
         calls: Number of calls allowed
         period: Time period in seconds
     """
     def decorator(func: Callable) -> Callable:
-        last_called = [0.0]
+        bucket = TokenBucket(calls, period)
         
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            current_time = time.time()
-            time_since_last = current_time - last_called[0]
-            
-            if time_since_last < period:
-                sleep_time = period - time_since_last
-                logger.debug(f"Rate limiting {func.__name__}: sleeping for {sleep_time:.2f}s")
+            sleep_time = bucket.acquire()
+            if sleep_time:
+                logger.debug("Rate limiting %s: sleeping for %.2fs", func.__name__, sleep_time)
                 time.sleep(sleep_time)
             
-            last_called[0] = time.time()
             return func(*args, **kwargs)
         
         return wrapper
     return decorator
 
-class FileManager:
-    """Utility class for file operations"""
-    
-    @staticmethod
-    def load_text(filepath: str) -> str:
-        """Load text from file"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
+@lru_cache(maxsize=8)
+def get_gemini_client(api_key: str) -> genai.Client:
+    """Get a Gemini client for an API key, shared by every component in the process
     
-    @staticmethod
-    def save_text(content: str, filepath: str) -> None:
-        """Save text to file"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-# Create global instance
-file_manager = FileManager() 
\ No newline at end of file
+    Args:
+        api_key: Gemini API key
+    """
+    return genai.Client(api_key=api_key)
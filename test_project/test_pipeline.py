@@ -3,7 +3,14 @@
 
 import sys
 import os
+import argparse
+import inspect
+import json
 import logging
+import queue
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add the src directory to Python path
@@ -18,70 +25,101 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+PROGRESS_FILE = Path(__file__).parent / "prompt_progress.txt"
+
+# Component tests that passed, keyed by component name, so unchanged components
+# aren't re-tested on every run. Set FORCE_COMPONENT_TESTS=1 to always run them.
+TEST_CACHE_FILE = Path(__file__).parent / ".test_cache.json"
+TEST_CACHE_TTL = 3600  # seconds
+
+# Processed prompt names, in the order they were completed. Loaded from
+# prompt_progress.txt once, then kept in sync as prompts are marked done.
+_processed_cache = None
+_processed_lock = threading.Lock()
+
+# Sorted prompt files, listed once per run since prompts/ rarely changes
+_prompt_files = None
+
+def _load_processed():
+    """Get the processed prompt names, reading the progress file on first use"""
+    global _processed_cache
+    with _processed_lock:
+        if _processed_cache is None:
+            _processed_cache = {}
+            if PROGRESS_FILE.exists():
+                with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+                    _processed_cache = dict.fromkeys(line.strip() for line in f if line.strip())
+        return _processed_cache
+
+def _get_prompt_files():
+    """Get all prompt files in alphabetical order"""
+    global _prompt_files
+    if _prompt_files is None:
+        _prompt_files = []
+        if PROMPTS_DIR.is_dir():
+            # scandir gets file types from the directory listing, no per-file stat
+            with os.scandir(PROMPTS_DIR) as entries:
+                _prompt_files = sorted(
+                    Path(entry.path) for entry in entries
+                    if entry.name.endswith(".txt") and entry.is_file()
+                )
+    return _prompt_files
+
+def _read_prompt(prompt_file):
+    """Read a prompt file, returning (prompt name, prompt content)"""
+    return prompt_file.stem, prompt_file.read_text(encoding='utf-8').strip()
+
 def get_next_prompt():
     """Get the next unprocessed prompt from prompts folder"""
-    prompts_dir = Path(__file__).parent / "prompts"
-    progress_file = Path(__file__).parent / "prompt_progress.txt"
-    
     # Get all prompt files
-    prompt_files = sorted(list(prompts_dir.glob("*.txt")))
+    prompt_files = _get_prompt_files()
     if not prompt_files:
         logger.error("No prompt files found in prompts/ directory")
         return None, None
     
     # Get processed prompts
-    processed_prompts = []
-    if progress_file.exists():
-        with open(progress_file, 'r') as f:
-            processed_prompts = [line.strip() for line in f if line.strip()]
+    processed_prompts = _load_processed()
     
     # Find first unprocessed prompt
     for prompt_file in prompt_files:
         prompt_name = prompt_file.stem
         if prompt_name not in processed_prompts:
-            # Read the prompt content
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                prompt_content = f.read().strip()
-            
-            return prompt_name, prompt_content
+            return _read_prompt(prompt_file)
     
     logger.info("🎉 All prompts have been processed!")
     return None, None
 
+def get_unprocessed_prompts():
+    """Get all unprocessed prompts from prompts folder, in order"""
+    processed_prompts = _load_processed()
+    prompt_files = [f for f in _get_prompt_files() if f.stem not in processed_prompts]
+    
+    # Read the prompt files concurrently, map() keeps them in order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(_read_prompt, prompt_files))
+
 def mark_prompt_as_processed(prompt_name):
     """Mark a prompt as processed"""
-    progress_file = Path(__file__).parent / "prompt_progress.txt"
-    
-    # Read existing processed prompts
-    processed_prompts = []
-    if progress_file.exists():
-        with open(progress_file, 'r') as f:
-            processed_prompts = [line.strip() for line in f if line.strip()]
+    processed_prompts = _load_processed()
     
-    # Add new prompt
-    processed_prompts.append(prompt_name)
-    
-    # Write updated list
-    with open(progress_file, 'w') as f:
-        for p in processed_prompts:
-            f.write(f"{p}\n")
+    # Append one line to the progress log instead of rewriting the whole file
+    with _processed_lock:
+        processed_prompts[prompt_name] = None
+        with open(PROGRESS_FILE, 'a', encoding='utf-8') as f:
+            f.write(f"{prompt_name}\n")
+            f.flush()
+            os.fsync(f.fileno())
     
     logger.info(f"✅ Marked '{prompt_name}' as processed")
 
 def get_status():
     """Get current processing status"""
-    prompts_dir = Path(__file__).parent / "prompts"
-    progress_file = Path(__file__).parent / "prompt_progress.txt"
-    
     # Get all prompts
-    prompt_files = sorted(list(prompts_dir.glob("*.txt")))
-    all_prompts = [f.stem for f in prompt_files]
+    all_prompts = [f.stem for f in _get_prompt_files()]
     
     # Get processed prompts
-    processed_prompts = []
-    if progress_file.exists():
-        with open(progress_file, 'r') as f:
-            processed_prompts = [line.strip() for line in f if line.strip()]
+    processed_prompts = _load_processed()
     
     # Find next prompt
     next_prompt = None
@@ -95,34 +133,90 @@ def get_status():
         "processed": len(processed_prompts),
         "remaining": len(all_prompts) - len(processed_prompts),
         "next_prompt": next_prompt,
-        "processed_list": processed_prompts
+        "processed_list": list(processed_prompts)
     }
 
+def _load_test_cache():
+    """Load cached component test results"""
+    if os.environ.get("FORCE_COMPONENT_TESTS") == "1" or not TEST_CACHE_FILE.exists():
+        return {}
+    try:
+        return json.loads(TEST_CACHE_FILE.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+
+def _is_test_cached(test_cache, name, component_class):
+    """Check whether a component passed recently and its source hasn't changed since"""
+    entry = test_cache.get(name)
+    if not entry or not entry.get("ok"):
+        return False
+    mtime = Path(inspect.getfile(component_class)).stat().st_mtime
+    return entry.get("mtime") == mtime and time.time() - entry.get("ts", 0) < TEST_CACHE_TTL
+
+def _test_component(component_class):
+    """Instantiate a component and run its self-test"""
+    return component_class().test()
+
 def test_individual_components():
-    """Test individual components"""
+    """Test individual components
+    
+    The subtitle and video creator tests read the newest final_audio_*.wav,
+    which the audio generator test writes, and the video creator test picks up
+    the newest subtitles, which the subtitle generator test writes. The tests
+    therefore run one stage after another. Components that passed within the
+    last hour and haven't changed since are skipped.
+    """
     logger.info("Testing individual components...")
     
     try:
-        # Test audio generator
         from src.scene_audio_generator import SceneAudioGenerator
-        audio_gen = SceneAudioGenerator()
-        if not audio_gen.test():
-            logger.error("Audio generator test failed")
-            return False
-        
-        # Test subtitle generator
         from src.subtitle_generator import SubtitleGenerator
-        subtitle_gen = SubtitleGenerator()
-        if not subtitle_gen.test():
-            logger.error("Subtitle generator test failed")
-            return False
-        
-        # Test video creator
         from src.bedtime_video_creator import BedtimeVideoCreator
-        video_creator = BedtimeVideoCreator()
-        if not video_creator.test():
-            logger.error("Video creator test failed")
-            return False
+        
+        stages = [
+            [("Audio generator", SceneAudioGenerator)],
+            [("Subtitle generator", SubtitleGenerator)],
+            [("Video creator", BedtimeVideoCreator)]
+        ]
+        
+        test_cache = _load_test_cache()
+        tested = False
+        for stage in stages:
+            pending = []
+            for name, component_class in stage:
+                if _is_test_cached(test_cache, name, component_class):
+                    logger.info(f"{name} unchanged since last passing test, skipping")
+                else:
+                    pending.append((name, component_class))
+            
+            if not pending:
+                continue
+            tested = True
+            
+            executor = ThreadPoolExecutor(max_workers=len(pending))
+            try:
+                futures = {
+                    executor.submit(_test_component, component_class): (name, component_class)
+                    for name, component_class in pending
+                }
+                
+                for future in as_completed(futures):
+                    name, component_class = futures[future]
+                    if not future.result():
+                        logger.error(f"{name} test failed")
+                        return False
+                    
+                    test_cache[name] = {
+                        "mtime": Path(inspect.getfile(component_class)).stat().st_mtime,
+                        "ok": True,
+                        "ts": time.time()
+                    }
+            finally:
+                # Fail fast: don't wait for the rest of the stage after a failure
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        if tested:
+            TEST_CACHE_FILE.write_text(json.dumps(test_cache, indent=2), encoding='utf-8')
         
         logger.info("✅ All individual components passed!")
         return True
@@ -131,47 +225,113 @@ def test_individual_components():
         logger.error(f"Component test failed: {e}")
         return False
 
-def run_pipeline():
-    """Run the complete pipeline with next prompt"""
+def _prefetch_pipelines(pipeline_class, prompt_files, handoff, stop):
+    """Read upcoming prompts and build their pipelines ahead of time
+    
+    Building a pipeline loads the Kokoro TTS model, checks FFmpeg and sets up
+    the API clients, so the next one is built while the current prompt is
+    being processed. Only one is built ahead: the next build starts once the
+    consumer has taken the previous pipeline.
+    """
+    for prompt_file in prompt_files:
+        if stop.is_set():
+            return
+        try:
+            prompt_name, user_prompt = _read_prompt(prompt_file)
+            pipeline = pipeline_class(prompt_name=prompt_name)
+        except Exception as e:
+            handoff.put(e)  # Raised again by the consuming thread
+            return
+        
+        if stop.is_set():
+            pipeline.cleanup()
+            return
+        handoff.put((prompt_name, user_prompt, pipeline))
+        handoff.join()
+    handoff.put(None)
+
+def _discard_prefetched(handoff, stop):
+    """Stop prefetching and clean up a pipeline that was built but not used"""
+    stop.set()
+    while True:
+        try:
+            item = handoff.get_nowait()
+        except queue.Empty:
+            return
+        handoff.task_done()
+        if isinstance(item, tuple):
+            item[2].cleanup()
+
+def run_pipeline(max_prompts=1):
+    """Run the complete pipeline for the next unprocessed prompts, one after another
+    
+    While a prompt is being processed, the pipeline for the next one is built
+    in a background thread and handed over through a one-slot queue, so it is
+    ready as soon as the current run (and its upload) finishes.
+    
+    Args:
+        max_prompts: Maximum number of prompts to process
+    """
     logger.info("Running complete pipeline...")
     
     try:
         from src.bedtime_history_pipeline import BedtimeHistoryPipeline
         
-        # Get next unprocessed prompt
-        prompt_name, user_prompt = get_next_prompt()
+        # Get next unprocessed prompts
+        processed_prompts = _load_processed()
+        prompt_files = [f for f in _get_prompt_files() if f.stem not in processed_prompts][:max_prompts]
         
-        if prompt_name is None or user_prompt is None:
+        if not prompt_files:
             logger.info("No more prompts to process")
             return False
         
-        logger.info(f"📝 Processing prompt: {prompt_name}")
-        logger.info(f"📖 Using prompt: {user_prompt[:100]}...")
+        handoff = queue.Queue(maxsize=1)
+        stop = threading.Event()
+        threading.Thread(
+            target=_prefetch_pipelines,
+            args=(BedtimeHistoryPipeline, prompt_files, handoff, stop),
+            daemon=True
+        ).start()
         
-        # Initialize and run pipeline with prompt name
-        pipeline = BedtimeHistoryPipeline(prompt_name=prompt_name)
-        results = pipeline.run(user_prompt)
-        
-        if results['success']:
-            logger.info("🎉 Pipeline completed successfully!")
-            logger.info(f"Video file: {results['video_file']}")
-            
-            # Mark prompt as processed
-            mark_prompt_as_processed(prompt_name)
-            
-            # Show updated status
-            status = get_status()
-            logger.info(f"📊 Progress: {status['processed']}/{status['total_prompts']} completed")
-            
-            if status['remaining'] > 0:
-                logger.info(f"⏭️  Next prompt: {status['next_prompt']}")
-            else:
-                logger.info("🎉 All prompts completed!")
-            
-            return True
-        else:
-            logger.error("❌ Pipeline failed")
-            return False
+        try:
+            while True:
+                prompt = handoff.get()
+                handoff.task_done()  # Lets the prefetch thread build the next pipeline
+                if prompt is None:
+                    return True
+                if isinstance(prompt, Exception):
+                    raise prompt
+                prompt_name, user_prompt, pipeline = prompt
+                
+                logger.info(f"📝 Processing prompt: {prompt_name}")
+                logger.info(f"📖 Using prompt: {user_prompt[:100]}...")
+                
+                # Run the pipeline built for this prompt
+                try:
+                    results = pipeline.run(user_prompt)
+                finally:
+                    pipeline.cleanup()
+                
+                if not results['success']:
+                    logger.error("❌ Pipeline failed")
+                    return False
+                
+                logger.info("🎉 Pipeline completed successfully!")
+                logger.info(f"Video file: {results['video_file']}")
+                
+                # Mark prompt as processed
+                mark_prompt_as_processed(prompt_name)
+                
+                # Show updated status
+                status = get_status()
+                logger.info(f"📊 Progress: {status['processed']}/{status['total_prompts']} completed")
+                
+                if status['remaining'] > 0:
+                    logger.info(f"⏭️  Next prompt: {status['next_prompt']}")
+                else:
+                    logger.info("🎉 All prompts completed!")
+        finally:
+            _discard_prefetched(handoff, stop)
             
     except Exception as e:
         logger.error(f"Pipeline failed: {e}")
@@ -179,8 +339,76 @@ def run_pipeline():
         traceback.print_exc()
         return False
 
+def _run_one(prompt_name, user_prompt):
+    """Run the complete pipeline for a single prompt in a worker thread"""
+    from src.bedtime_history_pipeline import BedtimeHistoryPipeline
+    
+    logger.info(f"📝 Processing prompt: {prompt_name}")
+    
+    # Each worker gets its own pipeline; the Whisper model is still shared
+    # process-wide, and its transcribe calls are serialized by a per-model lock
+    pipeline = BedtimeHistoryPipeline(prompt_name=prompt_name)
+    try:
+        return pipeline.run(user_prompt)
+    finally:
+        pipeline.cleanup()
+
+def run_pipeline_batch(max_workers=3):
+    """Run the complete pipeline for every unprocessed prompt in parallel
+    
+    Each run is dominated by remote API calls and uploads, so a few prompts
+    are processed at once in a bounded thread pool.
+    
+    Args:
+        max_workers: Maximum number of prompts processed concurrently
+    """
+    prompts = get_unprocessed_prompts()
+    if not prompts:
+        logger.info("No more prompts to process")
+        return False
+    
+    logger.info(f"Running pipeline for {len(prompts)} prompts with {max_workers} workers...")
+    
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_one, prompt_name, user_prompt): prompt_name
+            for prompt_name, user_prompt in prompts
+        }
+        
+        # Record progress as each prompt finishes so a crash doesn't lose completed work
+        for future in as_completed(futures):
+            prompt_name = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"❌ Pipeline failed for {prompt_name}: {e}")
+                failed += 1
+                continue
+            
+            if results['success']:
+                logger.info(f"🎉 Pipeline completed for {prompt_name}: {results['video_file']}")
+                mark_prompt_as_processed(prompt_name)
+            else:
+                logger.error(f"❌ Pipeline failed for {prompt_name}")
+                failed += 1
+    
+    status = get_status()
+    logger.info(f"📊 Progress: {status['processed']}/{status['total_prompts']} completed")
+    
+    return failed == 0
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Run the bedtime history pipeline on the prompts folder")
+    parser.add_argument("--batch", action="store_true",
+                        help="Process all unprocessed prompts instead of just the next one")
+    parser.add_argument("--workers", type=int, default=3,
+                        help="Number of prompts processed concurrently in batch mode (default: 3)")
+    parser.add_argument("--count", type=int, default=1,
+                        help="Number of prompts processed one after another otherwise (default: 1)")
+    args = parser.parse_args()
+    
     logger.info("🚀 Starting bedtime history pipeline test...")
     
     # Show current status
@@ -200,7 +428,11 @@ def main():
         return False
     
     # Run the complete pipeline
-    if not run_pipeline():
+    if args.batch:
+        if not run_pipeline_batch(max_workers=args.workers):
+            logger.error("❌ Batch pipeline run had failures")
+            return False
+    elif not run_pipeline(max_prompts=args.count):
         logger.error("❌ Pipeline test failed")
         return False
     
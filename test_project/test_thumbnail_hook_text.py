@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Test hook text extraction from the thumbnail model's description"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add the project directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.thumbnail_generator import ThumbnailGenerator
+
+extract_hook_text = ThumbnailGenerator._extract_hook_text
+
+class HookTextExtractionTest(unittest.TestCase):
+    def test_quoted_hook_in_marker_sentence(self):
+        description = 'I created a dramatic scene. The 3-word hook text is "SECRETS OF BABYLON".'
+        self.assertEqual(extract_hook_text(description), "SECRETS OF BABYLON")
+
+    def test_caps_run_without_marker(self):
+        description = "A pharaoh stands in profile. PHARAOH'S LAST STAND glows below."
+        self.assertEqual(extract_hook_text(description), "PHARAOH'S LAST STAND")
+
+    def test_marker_sentence_without_hook_falls_back_to_description(self):
+        description = ("I generated a Roman general in profile. The hook text sits at the bottom.\n\n"
+                       "It reads: EMPIRE RISES AGAIN")
+        self.assertEqual(extract_hook_text(description), "EMPIRE RISES AGAIN")
+
+    def test_punctuated_caps_after_marker(self):
+        description = "I generated a Roman general in profile. Hook text: EMPIRE. RISES. AGAIN."
+        self.assertEqual(extract_hook_text(description), "EMPIRE RISES AGAIN")
+
+    def test_no_hook(self):
+        self.assertEqual(extract_hook_text("A quiet desert at dusk."), "")
+
+if __name__ == "__main__":
+    unittest.main()
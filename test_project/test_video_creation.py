@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """Test video creation with minimal setup"""
 
+import io
+import os
 import sys
 import logging
+import struct
+import subprocess
+import threading
+from functools import lru_cache
 from pathlib import Path
 import tempfile
 import json
@@ -11,19 +17,51 @@ import json
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Video encoder settings, NVENC runs on the GPU's dedicated encoder block
+NVENC_ARGS = ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "ll", "-b:v", "4M"]
+LIBX264_ARGS = ["-c:v", "libx264"]
+
+@lru_cache(maxsize=None)
+def has_nvenc():
+    """Check once whether this FFmpeg build has the NVIDIA H.264 encoder"""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return b"h264_nvenc" in result.stdout
+
+def render_test_image(width=1920, height=1080, color="blue"):
+    """Encode a solid colored test image as PNG bytes in memory"""
+    from PIL import Image
+    
+    # A solid colored image is enough for FFmpeg; fast zlib level since size doesn't matter
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='PNG', optimize=False, compress_level=1)
+    return buffer.getvalue()
+
+def generate_test_tone(duration=5.0, sample_rate=44100, frequency=440):
+    """Generate a sine wave (A4 by default) as 16-bit samples"""
+    import numpy as np
+    
+    # Generate the sine wave in float32, the phase is computed in place
+    n_samples = int(sample_rate * duration)
+    phase = np.arange(n_samples, dtype=np.float32)
+    phase *= np.float32(2 * np.pi * frequency / sample_rate)
+    np.sin(phase, out=phase)
+    
+    # Scale and convert to 16-bit integer in one pass
+    audio_data = np.empty(n_samples, dtype=np.int16)
+    np.multiply(phase, np.float32(0.3 * 32767), out=audio_data, casting='unsafe')
+    return audio_data
+
 def create_test_image(output_path, width=1920, height=1080, color="blue"):
     """Create a test image using PIL"""
     try:
-        from PIL import Image, ImageDraw
-        
-        # Create a simple colored image
-        img = Image.new('RGB', (width, height), color)
-        draw = ImageDraw.Draw(img)
-        
-        # Add some text
-        draw.text((width//2-100, height//2), "Test Image", fill="white")
-        
-        img.save(output_path)
+        Path(output_path).write_bytes(render_test_image(width, height, color))
         logger.info(f"Created test image: {output_path}")
         return True
     except ImportError:
@@ -32,26 +70,29 @@ def create_test_image(output_path, width=1920, height=1080, color="blue"):
             f.write("dummy image")
         return False
 
+def write_wav_fast(path, sample_rate, samples):
+    """Write mono 16-bit PCM samples as a WAV file with a hand-packed 44-byte header"""
+    samples = samples.astype('<i2', copy=False)  # No copy for int16 on little-endian hosts
+    data_size = samples.size * 2
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+    with open(path, 'wb') as f:
+        f.write(header)
+        samples.tofile(f)
+
 def create_test_audio(output_path, duration=5.0):
     """Create a test audio file"""
     try:
-        import numpy as np
-        from scipy.io import wavfile
-        
-        # Generate a simple sine wave
         sample_rate = 44100
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        frequency = 440  # A4 note
-        audio_data = np.sin(2 * np.pi * frequency * t) * 0.3
-        
-        # Convert to 16-bit integer
-        audio_data = (audio_data * 32767).astype(np.int16)
-        
-        wavfile.write(output_path, sample_rate, audio_data)
+        write_wav_fast(output_path, sample_rate, generate_test_tone(duration, sample_rate))
         logger.info(f"Created test audio: {output_path}")
         return True
     except ImportError:
-        logger.warning("scipy not available, creating silent audio with FFmpeg")
+        logger.warning("numpy not available, creating silent audio with FFmpeg")
         # Create a silent audio file using FFmpeg
         import subprocess
         try:
@@ -78,57 +119,140 @@ def test_ffmpeg_basic():
         # Test FFmpeg version
         result = subprocess.run(
             ["ffmpeg", "-version"],
-            capture_output=True,
-            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             check=True
         )
+        # Only the first line of the banner is shown, so only that gets decoded
+        version = result.stdout.split(b"\n", 1)[0].decode("ascii", "replace")
         logger.info("✅ FFmpeg is available")
-        logger.info(f"Version: {result.stdout.splitlines()[0]}")
+        logger.info(f"Version: {version}")
         return True
     except Exception as e:
         logger.error(f"❌ FFmpeg test failed: {e}")
         return False
 
+def run_ffmpeg_piped(image_png, audio_pcm, sample_rate, output_args, timeout=None):
+    """Run FFmpeg with a PNG fed on stdin and mono 16-bit PCM on an extra pipe
+    
+    POSIX only: the audio pipe is handed to FFmpeg through pass_fds.
+    Raises subprocess.CalledProcessError on failure, like subprocess.run(check=True)
+    """
+    audio_read, audio_write = os.pipe()
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "png_pipe", "-i", "pipe:0",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", f"pipe:{audio_read}",
+        *output_args
+    ]
+    logger.info(f"Command: {' '.join(cmd)}")
+    
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            pass_fds=(audio_read,)
+        )
+    except Exception:
+        os.close(audio_write)
+        raise
+    finally:
+        os.close(audio_read)  # FFmpeg has its own copy
+    
+    # FFmpeg reads both inputs interleaved, so the audio is fed from its own thread
+    # to avoid blocking on one pipe while FFmpeg waits on the other
+    def feed_audio():
+        try:
+            with open(audio_write, 'wb') as f:
+                f.write(audio_pcm)
+        except BrokenPipeError:
+            pass  # FFmpeg exited early, its stderr says why
+    
+    writer = threading.Thread(target=feed_audio, daemon=True)
+    writer.start()
+    try:
+        _, stderr = proc.communicate(image_png, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise
+    finally:
+        writer.join()
+    
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr.decode(errors='replace'))
+
 def test_simple_video_creation():
     """Test creating a simple video with FFmpeg"""
     import subprocess
     
     with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
+        video_path = Path(temp_dir) / "test_video.mp4"
         
-        # Create test files
-        image_path = temp_path / "test_image.png"
-        audio_path = temp_path / "test_audio.wav"
-        video_path = temp_path / "test_video.mp4"
-        
-        logger.info("Creating test files...")
-        create_test_image(image_path)
-        create_test_audio(audio_path)
+        # Test inputs stay in memory and are piped straight to FFmpeg
+        logger.info("Creating test data...")
+        sample_rate = 44100
+        try:
+            image_png = render_test_image()
+            tone = generate_test_tone(5.0, sample_rate)
+        except ImportError as e:
+            logger.error(f"❌ Creating test data needs PIL and numpy: {e}")
+            return False
         
-        # Simple FFmpeg command to create video
-        cmd = [
-            "ffmpeg", "-y",
-            "-loop", "1",
-            "-i", str(image_path),
-            "-i", str(audio_path),
-            "-c:v", "libx264",
-            "-c:a", "aac",
-            "-shortest",
-            "-pix_fmt", "yuv420p",
-            str(video_path)
-        ]
+        # The extra audio pipe relies on pass_fds, which is POSIX only, so on
+        # Windows the inputs are written to temp files instead
+        use_pipes = os.name != "nt"
+        if use_pipes:
+            audio_pcm = tone.astype('<i2', copy=False).tobytes()
+        else:
+            image_path = Path(temp_dir) / "test_image.png"
+            audio_path = Path(temp_dir) / "test_audio.wav"
+            image_path.write_bytes(image_png)
+            write_wav_fast(audio_path, sample_rate, tone)
         
-        logger.info("Running FFmpeg command...")
-        logger.info(f"Command: {' '.join(cmd)}")
+        # Prefer the GPU encoder; the build may list NVENC without a usable GPU,
+        # so libx264 is kept as a fallback
+        encoders = [NVENC_ARGS, LIBX264_ARGS] if has_nvenc() else [LIBX264_ARGS]
         
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=30
-            )
+            for encoder_args in encoders:
+                # Simple FFmpeg command to create video
+                output_args = [
+                    *encoder_args,
+                    "-c:a", "aac",
+                    "-shortest",
+                    "-pix_fmt", "yuv420p",
+                    str(video_path)
+                ]
+                
+                logger.info("Running FFmpeg command...")
+                
+                try:
+                    if use_pipes:
+                        # -loop needs a seekable image file, so the piped image
+                        # is repeated by the loop filter
+                        run_ffmpeg_piped(
+                            image_png, audio_pcm, sample_rate,
+                            ["-vf", "loop=loop=-1:size=1", *output_args],
+                            timeout=30
+                        )
+                    else:
+                        cmd = [
+                            "ffmpeg", "-y",
+                            "-loop", "1",
+                            "-i", str(image_path),
+                            "-i", str(audio_path),
+                            *output_args
+                        ]
+                        logger.info(f"Command: {' '.join(cmd)}")
+                        subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=30)
+                    break
+                except subprocess.CalledProcessError:
+                    if encoder_args is encoders[-1]:
+                        raise
+                    logger.warning(f"{encoder_args[1]} encoding failed, falling back to libx264")
             
             if video_path.exists() and video_path.stat().st_size > 0:
                 logger.info(f"✅ Video created successfully: {video_path}")
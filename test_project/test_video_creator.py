@@ -1,50 +1,174 @@
+import json
 import logging
+import os
+import queue
+import threading
 from pathlib import Path
-import glob
+import re
 import subprocess
+import soundfile as sf
 from src.bedtime_video_creator import BedtimeVideoCreator
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Scene images (any timestamp) and the scene audio files of this run
+SCENE_IMAGE_PATTERN = re.compile(r"scene_(\d{3})_.*\.png")
+SCENE_AUDIO_PATTERN = re.compile(r"scene_(\d{3})_20250720_220949\.wav")
+MAX_SCENES = 200  # Assuming 200 scenes
+
+# Durations of earlier runs, reused while the audio file is unchanged
+MANIFEST_FILE = "scene_manifest.json"
+
+# Duration probes mostly wait on file I/O, so use more workers than cores
+PROBE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def probe_duration(audio_file):
+    """Get audio duration in seconds
+    
+    Reads the WAV header in-process with libsndfile; ffprobe is only spawned
+    for files libsndfile can't open.
+    """
+    try:
+        return sf.info(str(audio_file)).duration
+    except RuntimeError:
+        pass
+    
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        str(audio_file)
+    ]
+    return float(subprocess.check_output(cmd).decode().strip())
+
+def load_manifest(manifest_path):
+    """Load cached scene durations keyed by audio path"""
+    try:
+        with open(manifest_path) as f:
+            entries = json.load(f)["entries"]
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {entry["audio_path"]: entry for entry in entries}
+
+def save_manifest(manifest_path, entries):
+    """Write the scene manifest, via a temp file so a crash can't leave it half written"""
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"entries": entries}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def discover_scenes(output_dir, probe_queue):
+    """Stage 1: list the output directory once and queue each scene as soon as
+    both its image and its audio have been seen
+    """
+    images_by_scene = {}
+    audio_by_scene = {}
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                match = SCENE_IMAGE_PATTERN.fullmatch(entry.name)
+                if match:
+                    scene_number = int(match.group(1))
+                    # Take the first matching image if multiple exist
+                    if scene_number in images_by_scene:
+                        continue
+                    images_by_scene[scene_number] = entry.path
+                else:
+                    match = SCENE_AUDIO_PATTERN.fullmatch(entry.name)
+                    if not match:
+                        continue
+                    scene_number = int(match.group(1))
+                    audio_by_scene[scene_number] = Path(entry.path)
+                
+                if (1 <= scene_number <= MAX_SCENES and scene_number in images_by_scene
+                        and scene_number in audio_by_scene):
+                    probe_queue.put((scene_number, images_by_scene[scene_number], audio_by_scene[scene_number]))
+    finally:
+        # One stop marker per probe worker
+        for _ in range(PROBE_WORKERS):
+            probe_queue.put(None)
+
+def probe_scenes(probe_queue, result_queue, manifest):
+    """Stage 2: get the audio duration of each queued scene, skipping the probe
+    when the manifest has it for the same audio file modification time
+    """
+    while True:
+        scene = probe_queue.get()
+        if scene is None:
+            result_queue.put(None)
+            return
+        
+        scene_number, image_path, audio_path = scene
+        try:
+            mtime_ns = os.stat(audio_path).st_mtime_ns
+            cached = manifest.get(str(audio_path))
+            if cached and cached["mtime_ns"] == mtime_ns:
+                duration = cached["duration"]
+            else:
+                duration = probe_duration(audio_path)
+        except Exception as e:
+            mtime_ns = None
+            duration = e  # Raised again by the collecting thread
+        result_queue.put((scene_number, image_path, audio_path, mtime_ns, duration))
+
 def main():
     # Initialize paths
     output_dir = Path("OUTPUT/ancient_babylon")
     
     # Get all scene images
     images = []
-    scene_durations = []
     
     # Get the audio file
     final_audio_path = output_dir / "final_audio_20250720_220949.wav"
     subtitle_path = output_dir / "subtitle_20250720_222224.srt"
+    manifest_path = output_dir / MANIFEST_FILE
+    manifest = load_manifest(manifest_path)
     
-    # Get all scene images and their durations
-    for i in range(1, 201):  # Assuming 200 scenes
-        scene_file = output_dir / f"scene_{i:03d}_20250720_220949.wav"
-        if scene_file.exists():
-            # Find corresponding image (any timestamp)
-            image_pattern = str(output_dir / f"scene_{i:03d}_*.png")
-            image_files = glob.glob(image_pattern)
-            if image_files:  # Take the first matching image if multiple exist
-                image_file = image_files[0]
-                images.append({
-                    "scene_number": i,
-                    "image_path": image_file
-                })
-                
-                # Get audio duration using ffprobe
-                cmd = [
-                    "ffprobe",
-                    "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    str(scene_file)
-                ]
-                duration = float(subprocess.check_output(cmd).decode().strip())
-                scene_durations.append(duration)
-                logger.info(f"Added scene {i} with duration {duration:.2f}s")
+    # Directory listing, duration probes and collection run as overlapping stages
+    probe_queue = queue.Queue()
+    result_queue = queue.Queue()
+    threading.Thread(target=discover_scenes, args=(output_dir, probe_queue), daemon=True).start()
+    for _ in range(PROBE_WORKERS):
+        threading.Thread(target=probe_scenes, args=(probe_queue, result_queue, manifest), daemon=True).start()
+    
+    # Stage 3: collect results until every probe worker has finished
+    scenes = []
+    finished_workers = 0
+    while finished_workers < PROBE_WORKERS:
+        result = result_queue.get()
+        if result is None:
+            finished_workers += 1
+            continue
+        if isinstance(result[-1], Exception):
+            raise result[-1]
+        scenes.append(result)
+    
+    # Results arrive in completion order, restore scene order
+    scenes.sort(key=lambda scene: scene[0])
+    scene_durations = []
+    manifest_entries = []
+    for scene_number, image_path, audio_path, mtime_ns, duration in scenes:
+        images.append({
+            "scene_number": scene_number,
+            "image_path": image_path
+        })
+        scene_durations.append(duration)
+        manifest_entries.append({
+            "scene_number": scene_number,
+            "image_path": image_path,
+            "audio_path": str(audio_path),
+            "duration": duration,
+            "mtime_ns": mtime_ns
+        })
+        logger.info(f"Added scene {scene_number} with duration {duration:.2f}s")
+    
+    # Warm restarts skip probing every scene whose audio hasn't changed; with no
+    # scenes (e.g. a missing output directory) there is nothing to save
+    if manifest_entries:
+        save_manifest(manifest_path, manifest_entries)
     
     logger.info(f"Found {len(images)} images and audio files")
     
@@ -4,6 +4,90 @@
 import time
 import glob
 import os
+import threading
+from fnmatch import fnmatch
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object  # Optional, falls back to polling the directory
+    Observer = None
+
+OUTPUT_DIR = "OUTPUT"
+
+# Output files counted for each kind of progress, anywhere under OUTPUT/
+OUTPUT_PATTERNS = {
+    "stories": "bedtime_story_*.json",
+    "images": "scene_*.png",
+    "videos": "bedtime_video_*.mp4"
+}
+
+class ProgressTracker(FileSystemEventHandler):
+    """Keeps the set of output files of each kind, updated from filesystem events"""
+    
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.changed = threading.Event()  # Set whenever a tracked file appears or goes away
+        self.files = {}
+        self.scan()
+    
+    def scan(self):
+        """List all existing output files"""
+        files = {
+            kind: set(glob.glob(os.path.join(OUTPUT_DIR, "**", pattern), recursive=True))
+            for kind, pattern in OUTPUT_PATTERNS.items()
+        }
+        with self.lock:
+            self.files = files
+    
+    def _kind(self, path):
+        """Get the kind of output file a path is, or None"""
+        name = os.path.basename(path)
+        for kind, pattern in OUTPUT_PATTERNS.items():
+            if fnmatch(name, pattern):
+                return kind
+        return None
+    
+    def add(self, path):
+        """Record a new file if it matches one of the output patterns"""
+        kind = self._kind(path)
+        if kind is not None:
+            with self.lock:
+                self.files[kind].add(path)
+            self.changed.set()
+    
+    def remove(self, path):
+        """Forget a file that was deleted or moved away"""
+        kind = self._kind(path)
+        if kind is not None:
+            with self.lock:
+                self.files[kind].discard(path)
+            self.changed.set()
+    
+    def on_created(self, event):
+        if not event.is_directory:
+            self.add(event.src_path)
+    
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.remove(event.src_path)
+    
+    def on_moved(self, event):
+        # Files saved via a temp file and rename show up as moves
+        if not event.is_directory:
+            self.remove(event.src_path)
+            self.add(event.dest_path)
+    
+    def counts(self):
+        """Get (stories, images, videos) found so far"""
+        with self.lock:
+            return (
+                len(self.files["stories"]),
+                len(self.files["images"]),
+                sorted(self.files["videos"])
+            )
 
 def watch_progress():
     """Monitor pipeline progress"""
@@ -11,23 +95,26 @@ def watch_progress():
     print("Press Ctrl+C to stop watching")
     
     last_count = 0
+    tracker = ProgressTracker()
+    
+    # Let the OS push file events instead of re-listing OUTPUT/ every few seconds
+    observer = None
+    if Observer is not None and os.path.isdir(OUTPUT_DIR):
+        observer = Observer()
+        observer.schedule(tracker, OUTPUT_DIR, recursive=True)
+        observer.start()
     
     try:
         while True:
-            # Check for story files
-            stories = glob.glob("OUTPUT/bedtime_story_*.json")
-            
-            # Check for image files  
-            images = glob.glob("OUTPUT/scene_*.png")
-            
-            # Check for video files
-            videos = glob.glob("OUTPUT/bedtime_video_*.mp4")
+            if observer is None:
+                tracker.scan()
+            stories, images, videos = tracker.counts()
             
-            print(f"\r🎬 Stories: {len(stories)} | 🖼️  Images: {len(images)} | 🎥 Videos: {len(videos)}", end="", flush=True)
+            print(f"\r🎬 Stories: {stories} | 🖼️  Images: {images} | 🎥 Videos: {len(videos)}", end="", flush=True)
             
-            if len(images) != last_count and len(images) > 0:
-                print(f"\n✨ Progress: {len(images)} images generated!")
-                last_count = len(images)
+            if images != last_count and images > 0:
+                print(f"\n✨ Progress: {images} images generated!")
+                last_count = images
                 
             if len(videos) > 0:
                 video_file = videos[-1]
@@ -35,10 +122,20 @@ def watch_progress():
                 print(f"\n🎉 VIDEO COMPLETE! {video_file} ({size_mb:.1f}MB)")
                 break
                 
-            time.sleep(5)
+            if observer is None:
+                time.sleep(5)
+            else:
+                # Sleep until the observer reports a change; the counts read
+                # after clear() include it since the sets are updated first
+                tracker.changed.wait()
+                tracker.changed.clear()
             
     except KeyboardInterrupt:
         print("\n👋 Stopped watching")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
 
 if __name__ == "__main__":
     watch_progress() 
\ No newline at end of file